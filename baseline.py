@@ -1,43 +1,80 @@
 import numpy as np
-import random
 from src.environment import Building, Room, Point
 from src.physics import LossMatrix
-from src.config import RX_SENSITIVITY_DBM, TX_POWER_DBM
+from src.coverage import coverage_matrix, count_covered, count_covered_matmul
+from src.config import RX_SENSITIVITY_DBM, TX_POWER_DBM, MAX_ALLOWABLE_LOSS
 
 
-def evaluate_placement(active_indices, loss_matrix, threshold=RX_SENSITIVITY_DBM):
+def evaluate_placement(
+    active_indices,
+    loss_matrix,
+    threshold=RX_SENSITIVITY_DBM,
+    packed_cov=None,
+    max_allowable_loss=None,
+):
     if len(active_indices) == 0:
         return 0, 0
 
-    active_losses = loss_matrix[active_indices, :]
-    min_losses = np.min(active_losses, axis=0)
-    max_allowable_loss = TX_POWER_DBM - threshold
-
-    covered_sensors = np.sum(min_losses <= max_allowable_loss)
     total_sensors = loss_matrix.shape[1]
+
+    if packed_cov is not None:
+        # Precomputed coverage bitsets (see src.coverage.pack_coverage): a
+        # sensor is covered if any active router covers it.
+        coverage_pct = (count_covered(packed_cov, active_indices) / total_sensors) * 100
+        return coverage_pct, len(active_indices)
+
+    if max_allowable_loss is None:
+        max_allowable_loss = TX_POWER_DBM - threshold
+
+    # OR together per-router coverage rows instead of materialising the
+    # (n_active, n_sensors) sub-matrix and reducing it with np.min.
+    covered = loss_matrix[active_indices[0]] <= max_allowable_loss
+    for i in active_indices[1:]:
+        if covered.all():
+            break
+        np.logical_or(covered, loss_matrix[i] <= max_allowable_loss, out=covered)
+
+    covered_sensors = np.count_nonzero(covered)
     coverage_pct = (covered_sensors / total_sensors) * 100
 
     return coverage_pct, len(active_indices)
 
 
-def run_random_baseline(loss_matrix, n_routers, n_trials=100):
+def run_random_baseline(
+    loss_matrix,
+    n_routers,
+    n_trials=100,
+    max_allowable_loss=MAX_ALLOWABLE_LOSS,
+    seed=None,
+):
     print(f"Running Random Baseline ({n_routers} routers, {n_trials} trials)...")
-    n_candidates = loss_matrix.shape[0]
-    best_coverage = 0
-    avg_coverage = 0
+    n_candidates, n_sensors = loss_matrix.shape
+    # Slicing the permutations below would silently clamp the sample size
+    if not 0 <= n_routers <= n_candidates:
+        raise ValueError(
+            f"Cannot place {n_routers} routers on {n_candidates} candidates"
+        )
+
+    # Draw all trials at once: the first n_routers entries of an independent
+    # permutation per row are a uniform sample without replacement.
+    rng = np.random.default_rng(seed)
+    candidates = np.tile(np.arange(n_candidates), (n_trials, 1))
+    indices = rng.permuted(candidates, axis=1)[:, :n_routers]
+    X = np.zeros((n_trials, n_candidates), dtype=bool)
+    np.put_along_axis(X, indices, True, axis=1)
 
-    for _ in range(n_trials):
-        indices = random.sample(range(n_candidates), n_routers)
-        cov, _ = evaluate_placement(indices, loss_matrix)
-        best_coverage = max(best_coverage, cov)
-        avg_coverage += cov
+    cov_f32 = coverage_matrix(loss_matrix, max_allowable_loss).astype(np.float32)
+    coverage = count_covered_matmul(cov_f32, X) * (100 / n_sensors)
+    best_coverage = float(coverage.max())
+    avg_coverage = float(coverage.mean())
 
-    avg_coverage /= n_trials
     print(f"Random: Avg Coverage = {avg_coverage:.2f}%, Best = {best_coverage:.2f}%")
     return best_coverage
 
 
-def run_grid_baseline(loss_matrix, candidates, n_routers):
+def run_grid_baseline(
+    loss_matrix, candidates, n_routers, max_allowable_loss=MAX_ALLOWABLE_LOSS
+):
     # Simple heuristic: Pick n_routers spread out as much as possible
     # This is hard to do generically for any N, so we'll just pick every Kth candidate
     print(f"Running Grid Baseline ({n_routers} routers)...")
@@ -45,7 +82,9 @@ def run_grid_baseline(loss_matrix, candidates, n_routers):
     step = max(1, n_candidates // n_routers)
     indices = [i for i in range(0, n_candidates, step)][:n_routers]
 
-    cov, _ = evaluate_placement(indices, loss_matrix)
+    cov, _ = evaluate_placement(
+        indices, loss_matrix, max_allowable_loss=max_allowable_loss
+    )
     print(f"Grid: Coverage = {cov:.2f}%")
     return cov
 
@@ -8,6 +8,8 @@ BUILDING_DIMENSIONS = (60, 40, 21)  # x, y, z (meters)
 FREQUENCY_HZ = 2.4e9  # 2.4 GHz
 TX_POWER_DBM = 20.0  # Set to 20.0 as requested
 RX_SENSITIVITY_DBM = -80.0
+# Link budget: a sensor is covered if its path loss is at most this
+MAX_ALLOWABLE_LOSS = TX_POWER_DBM - RX_SENSITIVITY_DBM
 PATH_LOSS_EXPONENT = 2.5
 REFERENCE_DISTANCE = 1.0  # Meters
 
@@ -20,9 +22,17 @@ WALL_ATTENUATION = {
     "wood": 5.0,
 }
 FLOOR_ATTENUATION = 15.0  # dB per floor
+WALL_GRID_CELL_SIZE = 5.0  # Meters per cell of the 2D wall spatial index
+# Below this many walls, testing every wall per ray beats walking the grid
+WALL_GRID_MIN_WALLS = 512
+# Integer material codes (index into WALL_ATTENUATION) for array-based kernels
+MATERIAL_IDS = {name: i for i, name in enumerate(WALL_ATTENUATION)}
 
 # Optimization
 POPULATION_SIZE = 50
 GENERATIONS = 50
 ROUTER_COUNT_MIN = 1
 ROUTER_COUNT_MAX = 5
+# Fitness runs on the GPU (CuPy) when n_candidates * n_sensors * POPULATION_SIZE
+# exceeds this; below it host<->device transfers outweigh the GEMM speedup.
+GPU_MIN_WORK = 5e8
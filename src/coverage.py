@@ -0,0 +1,130 @@
+import numpy as np
+
+from .config import MAX_ALLOWABLE_LOSS
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+except ImportError:  # Optional: fall back to the NumPy implementations
+    HAS_NUMBA = False
+
+# Number of set bits for every byte value, used to popcount packed bitsets.
+POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+if HAS_NUMBA:
+    _M1 = np.uint64(0x5555555555555555)
+    _M2 = np.uint64(0x3333333333333333)
+    _M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+    _H01 = np.uint64(0x0101010101010101)
+
+    @njit(cache=True)
+    def _popcount64(x):
+        # Branchless SWAR popcount of a single uint64 word
+        x = x - ((x >> np.uint64(1)) & _M1)
+        x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+        x = (x + (x >> np.uint64(4))) & _M4
+        return np.int64((x * _H01) >> np.uint64(56))
+
+    @njit(cache=True)
+    def _count_covered_kernel(packed_cov, active_idx):
+        # OR the active rows word by word and popcount, without building
+        # the (n_active, n_words) intermediate.
+        total = 0
+        for w in range(packed_cov.shape[1]):
+            acc = np.uint64(0)
+            for i in active_idx:
+                acc |= packed_cov[i, w]
+            total += _popcount64(acc)
+        return total
+
+    @njit(parallel=True, cache=True)
+    def _count_covered_batch_kernel(packed_cov, X):
+        out = np.zeros(X.shape[0], dtype=np.int64)
+        for p in prange(X.shape[0]):
+            out[p] = _count_covered_kernel(packed_cov, np.flatnonzero(X[p]))
+        return out
+
+
+def coverage_matrix(
+    loss_matrix: np.ndarray, max_allowable_loss: float = MAX_ALLOWABLE_LOSS
+) -> np.ndarray:
+    """
+    Boolean (n_candidates, n_sensors) matrix: True where the path loss from
+    the candidate to the sensor fits within the link budget.
+    """
+    return loss_matrix <= max_allowable_loss
+
+
+def pack_coverage(cov_matrix: np.ndarray) -> np.ndarray:
+    """
+    Packs the sensor axis of a boolean coverage matrix into uint64 words,
+    giving an (n_candidates, n_words) bitset. Padding bits are zero.
+    """
+    packed = np.packbits(cov_matrix, axis=1)
+    pad = -packed.shape[1] % 8
+    if pad:
+        packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def popcount(words: np.ndarray):
+    """
+    Number of set bits in a packed uint64 bitset. For a 2-D
+    (n_rows, n_words) array, returns an (n_rows,) array of per-row counts.
+    """
+    octets = words.view(np.uint8)
+    if words.ndim == 1:
+        # Histogram of byte values dotted with the per-byte bit counts
+        return int(np.bincount(octets, minlength=256) @ POPCOUNT_LUT)
+    return POPCOUNT_LUT[octets].sum(axis=1, dtype=np.int64)
+
+
+def count_covered(packed_cov: np.ndarray, active_indices) -> int:
+    """Number of sensors covered by at least one of the active candidates."""
+    if HAS_NUMBA:
+        active_idx = np.asarray(active_indices, dtype=np.int64)
+        return int(_count_covered_kernel(packed_cov, active_idx))
+    acc = np.bitwise_or.reduce(packed_cov[active_indices], axis=0)
+    return popcount(acc)
+
+
+def count_covered_batch(packed_cov: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """
+    Covered-sensor counts for a whole population at once.
+    X is a boolean (pop_size, n_candidates) matrix of router placements.
+    """
+    if HAS_NUMBA:
+        return _count_covered_batch_kernel(packed_cov, X.astype(bool, copy=False))
+    rows, cols = np.nonzero(X)
+    acc = np.zeros((X.shape[0], packed_cov.shape[1]), dtype=np.uint64)
+    np.bitwise_or.at(acc, rows, packed_cov[cols])
+    return popcount(acc)
+
+
+def gpu_available() -> bool:
+    """True if CuPy is installed and a CUDA device is present."""
+    try:
+        import cupy
+
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:  # ImportError, or CUDA driver/runtime errors
+        return False
+
+
+def count_covered_matmul(cov_f32, X: np.ndarray) -> np.ndarray:
+    """
+    Covered-sensor counts for a whole population via a single GEMM.
+    cov_f32 is the coverage matrix as float32 (1.0 = covered); hits[p, s]
+    counts the active routers of individual p that cover sensor s.
+    If cov_f32 is a CuPy array the GEMM runs on the GPU and only the counts
+    are copied back.
+    """
+    if not isinstance(cov_f32, np.ndarray):
+        import cupy
+
+        hits = cupy.asarray(X, dtype=cupy.float32) @ cov_f32
+        return cupy.asnumpy(cupy.count_nonzero(hits, axis=1))
+
+    hits = X.astype(np.float32) @ cov_f32
+    return np.count_nonzero(hits, axis=1)
@@ -1,26 +1,45 @@
+import hashlib
 import numpy as np
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
-from .config import WALL_ATTENUATION
+from typing import Dict, List, Tuple, Optional
+from .config import WALL_ATTENUATION, MATERIAL_IDS, WALL_GRID_CELL_SIZE
 
+# Attenuation per material code, so MATERIAL_ATTENUATION[MATERIAL_IDS[m]] ==
+# WALL_ATTENUATION[m]
+MATERIAL_ATTENUATION = np.array(
+    [WALL_ATTENUATION[name] for name in MATERIAL_IDS], dtype=np.float32
+)
 
-@dataclass
+
+@dataclass(slots=True)
 class Point:
     x: float
     y: float
     z: float
 
-    def to_numpy(self):
-        return np.array([self.x, self.y, self.z])
 
+def as_coords(points) -> np.ndarray:
+    """
+    Converts a sequence of Points (or an existing (N, 3) array) into a
+    C-contiguous (N, 3) float32 coordinate array.
+    """
+    if isinstance(points, np.ndarray):
+        return np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+    return np.array([[p.x, p.y, p.z] for p in points], dtype=np.float32).reshape(-1, 3)
 
-@dataclass
+
+@dataclass(slots=True)
 class Wall:
     start: Point
     end: Point
     height: float
     material: str = "concrete"
     thickness: float = 0.15  # meters
+    attenuation: float = field(init=False, repr=False)
+    # Ray-test invariants: end - start in XY, and the top of the wall
+    dx: float = field(init=False, repr=False, compare=False)
+    dy: float = field(init=False, repr=False, compare=False)
+    z_top: float = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.material not in WALL_ATTENUATION:
@@ -28,6 +47,9 @@ class Wall:
                 f"Unknown material: {self.material}. Available: {list(WALL_ATTENUATION.keys())}"
             )
         self.attenuation = WALL_ATTENUATION[self.material]
+        self.dx = self.end.x - self.start.x
+        self.dy = self.end.y - self.start.y
+        self.z_top = self.start.z + self.height
 
     def get_bounds(self) -> Tuple[float, float, float, float, float, float]:
         """Returns (min_x, min_y, min_z, max_x, max_y, max_z)"""
@@ -45,12 +67,25 @@ class Room:
     floor_level: int = 0
     height: float = 3.0
     label_pos: Optional[Tuple[float, float]] = None  # (x, y) coordinates
+    # Cached result of bounds(), reset by add_wall
+    _bounds_cache: Optional[tuple] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Bumped by add_wall so a Building can tell its caches went stale
+    _version: int = field(default=0, init=False, repr=False, compare=False)
 
     def add_wall(self, start: Point, end: Point, material: str = "concrete"):
         wall = Wall(start, end, self.height, material)
         self.walls.append(wall)
+        self._bounds_cache = None
+        self._version += 1
 
     def bounds(self):
+        if self._bounds_cache is None:
+            self._bounds_cache = self._compute_bounds()
+        return self._bounds_cache
+
+    def _compute_bounds(self):
         if not self.walls:
             return (0, 0, 0, 0, 0, 0)
 
@@ -70,15 +105,85 @@ class Room:
         )
 
 
+class WallGrid:
+    """
+    Uniform 2D grid over the wall footprint. Each cell lists the walls whose
+    (slightly padded) XY bounding box overlaps it, stored in CSR form: the
+    walls of cell (cx, cy) are cell_walls[cell_offsets[c]:cell_offsets[c + 1]]
+    with c = cx * ny + cy. Points outside the grid map to the border cells.
+    """
+
+    EPS = 1e-6  # Padding so walls/rays on a cell border land in both cells
+
+    def __init__(self, walls_xyz: np.ndarray, cell_size: float = WALL_GRID_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        xs = walls_xyz[:, :, 0].astype(np.float64)
+        ys = walls_xyz[:, :, 1].astype(np.float64)
+        if len(walls_xyz) == 0:
+            self.x0, self.y0, self.nx, self.ny = 0.0, 0.0, 1, 1
+        else:
+            self.x0, self.y0 = float(xs.min()), float(ys.min())
+            self.nx = max(1, int(np.ceil((xs.max() - self.x0) / self.cell_size)))
+            self.ny = max(1, int(np.ceil((ys.max() - self.y0) / self.cell_size)))
+
+        # Cell ranges covered by each wall's padded bounding box
+        cx_lo = self._cells(xs.min(axis=1) - self.EPS, self.x0, self.nx)
+        cx_hi = self._cells(xs.max(axis=1) + self.EPS, self.x0, self.nx)
+        cy_lo = self._cells(ys.min(axis=1) - self.EPS, self.y0, self.ny)
+        cy_hi = self._cells(ys.max(axis=1) + self.EPS, self.y0, self.ny)
+
+        cells, walls = [], []
+        for k in range(len(walls_xyz)):
+            cx, cy = np.meshgrid(
+                np.arange(cx_lo[k], cx_hi[k] + 1),
+                np.arange(cy_lo[k], cy_hi[k] + 1),
+                indexing="ij",
+            )
+            cells.append((cx * self.ny + cy).ravel())
+            walls.append(np.full(cx.size, k))
+
+        cells = np.concatenate(cells) if cells else np.zeros(0, dtype=np.int64)
+        walls = np.concatenate(walls) if walls else np.zeros(0, dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        self.cell_walls = walls[order].astype(np.int32)
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.cell_offsets = np.zeros(self.nx * self.ny + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.cell_offsets[1:])
+
+    def _cells(self, v: np.ndarray, origin: float, n: int) -> np.ndarray:
+        idx = np.floor((v - origin) / self.cell_size).astype(np.int64)
+        return np.clip(idx, 0, n - 1)
+
+
 class Building:
     def __init__(self, name: str):
         self.name = name
         self.rooms: List[Room] = []
         self.floors: int = 1
+        # Lazily built structure-of-arrays views, reset whenever a room is
+        # added or a wall is added to one of the rooms
+        self._invalidate_caches()
+        self._rooms_by_floor: Dict[int, List[Room]] = {}
 
     def add_room(self, room: Room):
         self.rooms.append(room)
         self.floors = max(self.floors, room.floor_level + 1)
+        self._rooms_by_floor.setdefault(room.floor_level, []).append(room)
+        self._invalidate_caches()
+
+    def _invalidate_caches(self):
+        self._wall_arrays: Optional[dict] = None
+        self._room_bounds: Optional[np.ndarray] = None
+        self._floor_bounds: Optional[list] = None
+        self._wall_array: Optional[np.ndarray] = None
+        self._wall_grid: Optional[WallGrid] = None
+        self._rooms_version = sum(room._version for room in self.rooms)
+
+    def _sync_caches(self):
+        # Room.add_wall after add_room leaves the caches stale; detect it
+        # through the rooms' mutation counters
+        if sum(room._version for room in self.rooms) != self._rooms_version:
+            self._invalidate_caches()
 
     def get_all_walls(self) -> List[Wall]:
         walls = []
@@ -86,20 +191,213 @@ class Building:
             walls.extend(room.walls)
         return walls
 
+    def get_all_walls_soa(self) -> dict:
+        """
+        Returns all walls as contiguous float32 arrays (structure of arrays):
+        "starts" and "ends" (W, 3), both stacked in "xyz" (W, 2, 3),
+        the same coordinates transposed to "coords" (6, W) with rows
+        x1, y1, z1, x2, y2, z2 (unit-stride per wall), "attenuation" and
+        "heights" (W,), plus "material_ids" (W,) uint8 codes from
+        config.MATERIAL_IDS. The per-wall ray-test invariants "dx", "dy"
+        (end - start) and "z_top" (z1 + height) are (W,) float64, so they
+        match the float64 arithmetic of the ray tracing kernels exactly.
+        Built on first access and cached until the next add_room.
+        """
+        self._sync_caches()
+        if self._wall_arrays is None:
+            self._materialize_arrays()
+        return self._wall_arrays
+
+    def _materialize_arrays(self):
+        walls = self.get_all_walls()
+        n = len(walls)
+        xyz = np.empty((n, 2, 3), dtype=np.float32)
+        heights = np.empty(n, dtype=np.float32)
+        material_ids = np.empty(n, dtype=np.uint8)
+        for k, wall in enumerate(walls):
+            xyz[k, 0] = (wall.start.x, wall.start.y, wall.start.z)
+            xyz[k, 1] = (wall.end.x, wall.end.y, wall.end.z)
+            heights[k] = wall.height
+            material_ids[k] = MATERIAL_IDS[wall.material]
+        starts = xyz[:, 0].astype(np.float64)
+        self._wall_arrays = {
+            "xyz": xyz,
+            "starts": np.ascontiguousarray(xyz[:, 0]),
+            "ends": np.ascontiguousarray(xyz[:, 1]),
+            "coords": np.ascontiguousarray(xyz.reshape(n, 6).T),
+            "attenuation": MATERIAL_ATTENUATION[material_ids],
+            "heights": heights,
+            "material_ids": material_ids,
+            "dx": xyz[:, 1, 0] - starts[:, 0],
+            "dy": xyz[:, 1, 1] - starts[:, 1],
+            "z_top": starts[:, 2] + heights,
+        }
+
+    @property
+    def walls_xyz(self) -> np.ndarray:
+        return self.get_all_walls_soa()["xyz"]
+
+    @property
+    def wall_starts(self) -> np.ndarray:
+        return self.get_all_walls_soa()["starts"]
+
+    @property
+    def wall_ends(self) -> np.ndarray:
+        return self.get_all_walls_soa()["ends"]
+
+    @property
+    def wall_coords(self) -> np.ndarray:
+        return self.get_all_walls_soa()["coords"]
+
+    @property
+    def wall_attenuation(self) -> np.ndarray:
+        return self.get_all_walls_soa()["attenuation"]
+
+    @property
+    def wall_heights(self) -> np.ndarray:
+        return self.get_all_walls_soa()["heights"]
+
+    @property
+    def wall_material_ids(self) -> np.ndarray:
+        return self.get_all_walls_soa()["material_ids"]
+
+    @property
+    def wall_dx(self) -> np.ndarray:
+        return self.get_all_walls_soa()["dx"]
+
+    @property
+    def wall_dy(self) -> np.ndarray:
+        return self.get_all_walls_soa()["dy"]
+
+    @property
+    def wall_z_top(self) -> np.ndarray:
+        return self.get_all_walls_soa()["z_top"]
+
+    def get_wall_array(self) -> np.ndarray:
+        """
+        All walls as one (W,) structured float64 array with fields
+        x1, y1, z1, x2, y2, z2 (start/end), h (height), att (attenuation)
+        and the ray-test invariants dx, dy and z_top (see Wall), for
+        vectorized ray tracing. Cached until the next add_room.
+        """
+        self._sync_caches()
+        if self._wall_array is None:
+            self._wall_array = np.array(
+                [
+                    (
+                        w.start.x,
+                        w.start.y,
+                        w.start.z,
+                        w.end.x,
+                        w.end.y,
+                        w.end.z,
+                        w.height,
+                        w.attenuation,
+                        w.dx,
+                        w.dy,
+                        w.z_top,
+                    )
+                    for w in self.get_all_walls()
+                ],
+                dtype=[
+                    (name, np.float64)
+                    for name in (
+                        "x1",
+                        "y1",
+                        "z1",
+                        "x2",
+                        "y2",
+                        "z2",
+                        "h",
+                        "att",
+                        "dx",
+                        "dy",
+                        "z_top",
+                    )
+                ],
+            )
+        return self._wall_array
+
+    def digest(self) -> str:
+        """
+        SHA-256 hex digest of everything that affects propagation: wall
+        geometry and attenuation, room bounds and floor levels.
+        """
+        floor_levels = np.array([room.floor_level for room in self.rooms])
+        h = hashlib.sha256()
+        for arr in (
+            self.walls_xyz,
+            self.wall_heights,
+            self.wall_attenuation,
+            self.room_bounds,
+            floor_levels.astype(np.int64),
+        ):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()
+
+    def get_wall_grid(self) -> WallGrid:
+        """Spatial index over the walls, cached until the next add_room."""
+        self._sync_caches()
+        if self._wall_grid is None:
+            self._wall_grid = WallGrid(self.walls_xyz)
+        return self._wall_grid
+
+    @property
+    def room_bounds(self) -> np.ndarray:
+        """(R, 6) array of room bounds, one row per room (see Room.bounds)."""
+        self._sync_caches()
+        if self._room_bounds is None:
+            # Kept in float64 so room edges compare exactly against point
+            # coordinates, as the scalar bounds check did.
+            self._room_bounds = np.array(
+                [room.bounds() for room in self.rooms], dtype=np.float64
+            ).reshape(-1, 6)
+        return self._room_bounds
+
     def is_point_inside(self, point: Point) -> bool:
+        return bool(self.is_points_inside(np.array([[point.x, point.y, point.z]]))[0])
+
+    def is_points_inside(self, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorized inside test for an (N, 3) array of points; returns an (N,)
+        boolean mask.
+        """
         # Simple bounding box check for now
         # In a real implementation, we'd do ray casting polygon check
         # For this thesis, we assume the building is the union of room bounding boxes
-        for room in self.rooms:
-            min_x, min_y, min_z, max_x, max_y, max_z = room.bounds()
-            if (
-                min_x <= point.x <= max_x
-                and min_y <= point.y <= max_y
-                and min_z <= point.z <= max_z
-            ):
-                return True
-                return True
-        return False
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        inside = np.zeros(len(pts), dtype=bool)
+
+        # Only test each point against the rooms of the floor(s) whose Z
+        # range contains it.
+        for z_min, z_max, bounds in self._get_floor_bounds():
+            sel = np.flatnonzero((pts[:, 2] >= z_min) & (pts[:, 2] <= z_max))
+            if len(sel) == 0:
+                continue
+            sub = pts[sel]
+            mins = bounds[:, None, :3]  # (R_floor, 1, 3)
+            maxs = bounds[:, None, 3:]
+            hit = ((sub >= mins) & (sub <= maxs)).all(axis=-1)  # (R_floor, n)
+            inside[sel] |= hit.any(axis=0)
+        return inside
+
+    def _get_floor_bounds(self) -> list:
+        """
+        Per-floor (z_min, z_max, (R_floor, 6) room bounds) tuples. Every room
+        box lies within its floor's Z range, so rooms of other floors can
+        never contain a point outside that range.
+        """
+        self._sync_caches()
+        if self._floor_bounds is None:
+            self._floor_bounds = []
+            for rooms in self._rooms_by_floor.values():
+                bounds = np.array(
+                    [room.bounds() for room in rooms], dtype=np.float64
+                ).reshape(-1, 6)
+                self._floor_bounds.append(
+                    (bounds[:, 2].min(), bounds[:, 5].max(), bounds)
+                )
+        return self._floor_bounds
 
     def get_floor_level(self, z: float) -> int:
         """Returns the floor level for a given Z coordinate."""
@@ -110,11 +408,22 @@ class Building:
                 return room.floor_level
         return 0  # Default to ground floor if undefined
 
+    def get_floor_levels(self, zs: np.ndarray) -> np.ndarray:
+        """Vectorized get_floor_level for an array of Z coordinates."""
+        zs = np.asarray(zs, dtype=np.float64).reshape(-1, 1)
+        bounds = self.room_bounds
+        match = (bounds[:, 2] <= zs) & (zs < bounds[:, 5] + 0.1)  # (N, R)
+        # First matching room wins, as in the scalar loop
+        levels = np.array([room.floor_level for room in self.rooms], dtype=np.int64)
+        if len(levels) == 0:
+            return np.zeros(len(zs), dtype=np.int64)
+        return np.where(match.any(axis=1), levels[match.argmax(axis=1)], 0)
+
     @staticmethod
     def from_json(file_path: str):
         import json
 
-        with open(file_path, "r") as f:
+        with open(file_path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
         building = Building(data["name"])
@@ -1,8 +1,10 @@
 import numpy as np
-from pymoo.core.problem import ElementwiseProblem
+from typing import Optional
+from pymoo.core.problem import Problem
 from pymoo.algorithms.moo.nsga2 import NSGA2
-from pymoo.operators.crossover.pntx import TwoPointCrossover
-from pymoo.operators.mutation.bitflip import BitflipMutation
+from pymoo.core.crossover import Crossover
+from pymoo.core.duplicate import DuplicateElimination
+from pymoo.core.mutation import Mutation
 from pymoo.core.sampling import Sampling
 from pymoo.optimize import minimize
 from pymoo.termination import get_termination
@@ -13,6 +15,14 @@ from .config import (
     GENERATIONS,
     ROUTER_COUNT_MAX,
     TX_POWER_DBM,
+    GPU_MIN_WORK,
+)
+from .coverage import (
+    coverage_matrix,
+    pack_coverage,
+    count_covered_batch,
+    count_covered_matmul,
+    gpu_available,
 )
 
 
@@ -26,14 +36,131 @@ class SparseSampling(Sampling):
         return X
 
 
-class RouterPlacementProblem(ElementwiseProblem):
-    def __init__(self, loss_matrix: np.ndarray, threshold: float = RX_SENSITIVITY_DBM):
+class SparseCrossover(Crossover):
+    """
+    Exchanges routers between two parents. Candidates where both parents
+    agree are inherited unchanged; each candidate active in only one parent
+    is handed to either child with equal probability. Only those few
+    differing positions draw random numbers.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(n_parents=2, n_offsprings=2, **kwargs)
+
+    def _do(self, problem, X, random_state=None, **kwargs):
+        # X has shape (n_parents, n_matings, n_var)
+        rng = random_state if random_state is not None else np.random
+        Q = np.copy(X)
+
+        mating, var = np.nonzero(X[0] != X[1])
+        swap = rng.random(len(mating)) < 0.5
+        mating, var = mating[swap], var[swap]
+        Q[0, mating, var] = X[1, mating, var]
+        Q[1, mating, var] = X[0, mating, var]
+        return Q
+
+
+class SparseMutation(Mutation):
+    """
+    Edits the active router list of each individual instead of drawing a
+    random number for every candidate bit: one router is either moved to
+    a random candidate, added, or removed (never the last one).
+    """
+
+    def _do(self, problem, X, random_state=None, **kwargs):
+        rng = random_state if random_state is not None else np.random
+        Xp = np.copy(X)
+
+        n_var = problem.n_var
+        ops = rng.choice(3, size=len(X))  # 0: move, 1: add, 2: remove
+        targets = rng.choice(n_var, size=len(X))
+        picks = rng.random(len(X))
+
+        for k in range(len(X)):
+            active = np.flatnonzero(Xp[k])
+            if len(active) == 0:
+                Xp[k, targets[k]] = True
+                continue
+
+            selected = active[int(picks[k] * len(active))]
+            if ops[k] == 0 or (ops[k] == 2 and len(active) == 1):
+                Xp[k, selected] = False
+                Xp[k, targets[k]] = True
+            elif ops[k] == 1:
+                Xp[k, targets[k]] = True
+            else:
+                Xp[k, selected] = False
+
+        return Xp
+
+
+class BitsetDuplicateElimination(DuplicateElimination):
+    """
+    Detects duplicate chromosomes by their packed bytes (8 candidates per
+    byte) in a hash set: O(pop) instead of pymoo's default pairwise
+    distance matrix. Set lookups hash first and only compare full keys on
+    a hash match, so equality is still exact.
+    """
+
+    @staticmethod
+    def _keys(pop):
+        packed = np.packbits(pop.get("X").astype(bool), axis=1)
+        return [row.tobytes() for row in packed]
+
+    def _do(self, pop, other, is_duplicate):
+        seen = set() if other is None else set(self._keys(other))
+        for i, key in enumerate(self._keys(pop)):
+            if key in seen:
+                is_duplicate[i] = True
+            else:
+                seen.add(key)
+        return is_duplicate
+
+
+class RouterPlacementProblem(Problem):
+    def __init__(
+        self,
+        loss_matrix: np.ndarray,
+        threshold: float = RX_SENSITIVITY_DBM,
+        method: str = "matmul",
+        cache_size: int = 10 * POPULATION_SIZE,
+        use_gpu: bool = False,
+    ):
         """
         Binary optimization problem:
         x[i] = 1 if router is placed at candidate i, 0 otherwise.
+
+        method selects the coverage kernel: "matmul" (one float32 GEMM per
+        generation) or "bitset" (packed uint64 OR + popcount, JIT-compiled
+        when numba is available; cheaper for small populations).
+        With use_gpu the matmul kernel runs on the GPU through CuPy.
+
+        Fitness is deterministic, so objectives of the last cache_size
+        distinct chromosomes are memoised (FIFO eviction; 0 disables).
         """
+        if method not in ("matmul", "bitset"):
+            raise ValueError(f"Unknown method: {method}. Available: matmul, bitset")
+        if use_gpu and method != "matmul":
+            raise ValueError("use_gpu requires method='matmul'")
+
         self.loss_matrix = loss_matrix  # (n_candidates, n_sensors)
         self.threshold = threshold
+        self.max_allowable_loss = TX_POWER_DBM - threshold
+        self.method = method
+        self.cache_size = cache_size
+        self._cache = {}  # packed chromosome bytes -> (f1, f2)
+        # The loss budget is fixed for the whole run, so coverage can be
+        # decided once per (candidate, sensor) pair up front, either as
+        # float32 for the matmul kernel or as packed bitsets.
+        self.cov_matrix = coverage_matrix(loss_matrix, self.max_allowable_loss)
+        if method == "matmul":
+            self.cov_f32 = self.cov_matrix.astype(np.float32)
+            if use_gpu:
+                import cupy
+
+                self.cov_f32 = cupy.asarray(self.cov_f32)
+        else:
+            self.packed_cov = pack_coverage(self.cov_matrix)
         n_var = loss_matrix.shape[0]
 
         super().__init__(
@@ -45,40 +172,49 @@ class RouterPlacementProblem(ElementwiseProblem):
             vtype=bool,
         )
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        # x is a boolean array of shape (n_candidates,)
-        active_indices = np.where(x)[0]
-
-        if len(active_indices) == 0:
-            # No routers placed -> 0 coverage, 0 energy
-            # We want to maximize coverage (minimize negative)
-            # We want to minimize energy
-            out["F"] = [0, 0]  # Technically 0 coverage is bad, but 0 energy is good.
-            # To penalize "no routers", we can set coverage to a huge positive number (minimization)
-            # Total sensors
-            n_sensors = self.loss_matrix.shape[1]
-            out["F"] = [n_sensors, 0]
+    def _evaluate(self, X, out, *args, **kwargs):
+        # X is a boolean array of shape (pop_size, n_candidates); the whole
+        # population is evaluated in one call.
+        X = X.astype(bool, copy=False)
+        if self.cache_size <= 0:
+            out["F"] = self._objectives(X)
             return
 
-        # Calculate Coverage
-        # Get sub-matrix for active routers
-        active_losses = self.loss_matrix[active_indices, :]  # (n_active, n_sensors)
+        # Offspring often recreate chromosomes seen in earlier generations;
+        # only evaluate the ones missing from the cache.
+        keys = [row.tobytes() for row in np.packbits(X, axis=1)]
+        F = np.empty((len(X), 2), dtype=np.int64)
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                F[i] = cached
+
+        if misses:
+            F[misses] = self._objectives(X[misses])
+            for i in misses:
+                self._cache[keys[i]] = tuple(F[i])
+            while len(self._cache) > self.cache_size:
+                del self._cache[next(iter(self._cache))]
+
+        out["F"] = F
 
+    def _objectives(self, X):
+        # Calculate Coverage
         # For each sensor, the received signal is the MAX signal from any active router
         # Signal = TxPower - PathLoss.
-        # Since TxPower is constant, Max Signal <=> Min Path Loss.
-        # So we find min path loss for each sensor.
-        min_path_losses = np.min(active_losses, axis=0)
-
-        # Check if signal > threshold
-        # Signal = 20 - Loss
-        # 20 - Loss >= -85  =>  Loss <= 105
-        # So we check if min_path_loss <= (TxPower - Threshold)
-        # Let's assume TxPower is handled outside or we just use loss directly.
-        # In config, TX_POWER_DBM = 20.
-        max_allowable_loss = TX_POWER_DBM - self.threshold
-
-        covered_sensors = np.sum(min_path_losses <= max_allowable_loss)
+        # Since TxPower is constant, Max Signal <=> Min Path Loss, and a sensor
+        # is covered iff min_path_loss <= (TxPower - Threshold).
+        # That comparison is precomputed in self.cov_matrix, so a sensor is
+        # covered iff any active router covers it.
+        # An individual with no routers covers nothing, which already
+        # penalises it with f1 = n_sensors.
+        if self.method == "matmul":
+            covered_sensors = count_covered_matmul(self.cov_f32, X)
+        else:
+            covered_sensors = count_covered_batch(self.packed_cov, X)
         total_sensors = self.loss_matrix.shape[1]
         uncovered_sensors = total_sensors - covered_sensors
 
@@ -87,22 +223,30 @@ class RouterPlacementProblem(ElementwiseProblem):
         # f2: Minimize Number of Routers (Energy)
 
         f1 = uncovered_sensors
-        f2 = len(active_indices)
+        f2 = X.sum(axis=1)
 
-        out["F"] = [f1, f2]
+        return np.column_stack([f1, f2])
 
 
 class Optimizer:
-    def __init__(self, loss_matrix: np.ndarray):
+    def __init__(self, loss_matrix: np.ndarray, use_gpu: Optional[bool] = None):
+        """
+        use_gpu=None picks the GPU automatically when CuPy and a CUDA device
+        are available and the problem is large enough (see GPU_MIN_WORK).
+        """
         self.loss_matrix = loss_matrix
-        self.problem = RouterPlacementProblem(loss_matrix)
+        if use_gpu is None:
+            work = loss_matrix.shape[0] * loss_matrix.shape[1] * POPULATION_SIZE
+            use_gpu = work >= GPU_MIN_WORK and gpu_available()
+        self.use_gpu = use_gpu
+        self.problem = RouterPlacementProblem(loss_matrix, use_gpu=use_gpu)
 
         self.algorithm = NSGA2(
             pop_size=POPULATION_SIZE,
             sampling=SparseSampling(),
-            crossover=TwoPointCrossover(),
-            mutation=BitflipMutation(),
-            eliminate_duplicates=True,
+            crossover=SparseCrossover(),
+            mutation=SparseMutation(),
+            eliminate_duplicates=BitsetDuplicateElimination(),
         )
 
         self.termination = get_termination("n_gen", GENERATIONS)
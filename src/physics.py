@@ -1,6 +1,8 @@
+import hashlib
+import os
 import numpy as np
-from typing import List, Tuple
-from .environment import Building, Point, Wall
+from typing import List, Optional, Tuple, Union
+from .environment import Building, Point, Room, Wall, as_coords
 from .config import (
     FREQUENCY_HZ,
     TX_POWER_DBM,
@@ -8,8 +10,31 @@ from .config import (
     REFERENCE_DISTANCE,
     GRID_SIZE,
     FLOOR_ATTENUATION,
+    WALL_GRID_MIN_WALLS,
 )
-from scipy.spatial.distance import cdist
+from .physics_kernels import HAS_NUMBA
+
+if HAS_NUMBA:
+    from .physics_kernels import loss_matrix, loss_matrix_grid
+
+
+# Modules whose code determines the loss matrix values (ray tracing, path
+# loss, floor levels); their source is part of LossMatrix.cache_key()
+_MATRIX_SOURCES = ("physics.py", "physics_kernels.py", "environment.py")
+_code_digest: Optional[str] = None
+
+
+def matrix_code_digest() -> str:
+    """SHA-256 hex digest of the source of the loss-matrix code."""
+    global _code_digest
+    if _code_digest is None:
+        h = hashlib.sha256()
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in _MATRIX_SOURCES:
+            with open(os.path.join(src_dir, name), "rb") as f:
+                h.update(f.read())
+        _code_digest = h.hexdigest()
+    return _code_digest
 
 
 class PathLossModel:
@@ -61,13 +86,39 @@ class RayTracing:
         return False
 
     @staticmethod
-    def calculate_wall_loss(p1: Point, p2: Point, building: Building) -> float:
-        total_attenuation = 0.0
-        walls = building.get_all_walls()
-        for wall in walls:
-            if RayTracing.intersect(p1, p2, wall):
-                total_attenuation += wall.attenuation
-        return total_attenuation
+    def calculate_wall_loss(
+        p1: Point,
+        p2: Point,
+        building: Building,
+        walls: Optional[np.ndarray] = None,
+    ) -> float:
+        # Same test as intersect(), evaluated for all walls at once.
+        # Callers tracing many rays can pass building.get_wall_array() once.
+        w = building.get_wall_array() if walls is None else walls
+        dx = p2.x - p1.x
+        dy = p2.y - p1.y
+        wdx = w["dx"]
+        wdy = w["dy"]
+        ox = p1.x - w["x1"]
+        oy = p1.y - w["y1"]
+
+        denom = wdy * dx - wdx * dy
+        # Parallel walls (denom == 0) give inf/nan here and are masked out below
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ua = (wdx * oy - wdy * ox) / denom
+            ub = (dx * oy - dy * ox) / denom
+            z_interp = p1.z + ua * (p2.z - p1.z)
+
+        hit = (
+            (denom != 0)
+            & (ua >= 0)
+            & (ua <= 1)
+            & (ub >= 0)
+            & (ub <= 1)
+            & (z_interp >= w["z1"])
+            & (z_interp <= w["z_top"])
+        )
+        return float(w["att"][hit].sum())
 
 
 class LossMatrix:
@@ -79,13 +130,35 @@ class LossMatrix:
     def __init__(
         self,
         building: Building,
-        candidate_points: List[Point],
-        sensor_points: List[Point],
+        candidate_points: Union[np.ndarray, List[Point]],
+        sensor_points: Union[np.ndarray, List[Point]],
+        max_useful_loss: float = np.inf,
+        cache_dir: Optional[str] = None,
     ):
+        """
+        Pruning is opt-in: with a finite max_useful_loss, pairs whose path +
+        floor loss alone exceeds it skip wall tracing and the entry holds
+        that lower bound instead of the true loss. The matrix is then only
+        valid for link budgets of at most max_useful_loss (e.g.
+        MAX_ALLOWABLE_LOSS + 10 dB); larger budgets would count such pairs
+        as covered, and displayed signal levels are overestimated. The
+        default (np.inf) computes exact losses everywhere.
+
+        With cache_dir, compute() writes the matrix to a file there, named
+        by cache_key(), and later runs with the same inputs and code
+        memory-map it read-only instead of recomputing (see cache_key).
+        """
         self.building = building
-        self.candidates = candidate_points
-        self.sensors = sensor_points
-        self.matrix = np.zeros((len(candidate_points), len(sensor_points)))
+        self.max_useful_loss = max_useful_loss
+        self.cache_dir = cache_dir
+        # Points are held as (N, 3) coordinate arrays
+        self.candidates = as_coords(candidate_points)
+        self.sensors = as_coords(sensor_points)
+        # The whole pipeline runs in float32: dB losses need nowhere near
+        # float64 precision, and it halves the memory traffic of the matrix
+        # and of every downstream coverage reduction.
+        shape = (len(self.candidates), len(self.sensors))
+        self.matrix = np.zeros(shape, dtype=np.float32)
         self.pl_model = PathLossModel()
 
     def compute(self):
@@ -93,39 +166,198 @@ class LossMatrix:
             f"Computing Loss Matrix: {len(self.candidates)} candidates x {len(self.sensors)} sensors..."
         )
 
+        if self.cache_dir is None:
+            self._compute()
+            print("Loss Matrix Computation Complete.")
+            return self.matrix
+
+        path = os.path.join(self.cache_dir, f"loss_{self.cache_key()}.f32")
+        shape = self.matrix.shape
+        if os.path.exists(path) and os.path.getsize(path) == self.matrix.nbytes:
+            print(f"Loaded cached Loss Matrix from {path}")
+        else:
+            # Compute straight into a file-backed array (the OS pages it out
+            # as needed), then publish it under its final name only once
+            # complete, so an interrupted run never leaves a partial cache.
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            self.matrix = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=shape)
+            self._compute()
+            self.matrix.flush()
+            self.matrix = None  # Unmap before renaming (required on Windows)
+            os.replace(tmp_path, path)
+            print("Loss Matrix Computation Complete.")
+        self.matrix = np.memmap(path, dtype=np.float32, mode="r", shape=shape)
+        return self.matrix
+
+    def cache_key(self) -> str:
+        """
+        SHA-256 hex digest of every input of the matrix: building geometry,
+        candidate and sensor coordinates, the propagation parameters and the
+        source of the code computing it, so any change gives a new file.
+        Files for old keys are never deleted; clear cache_dir by hand to
+        reclaim the space.
+        """
+        params = np.array(
+            [
+                self.pl_model.pl_ref,
+                self.pl_model.n,
+                REFERENCE_DISTANCE,
+                FLOOR_ATTENUATION,
+                self.max_useful_loss,
+            ]
+        )
+        h = hashlib.sha256(matrix_code_digest().encode())
+        h.update(self.building.digest().encode())
+        for arr in (np.array(self.matrix.shape), self.candidates, self.sensors, params):
+            h.update(arr.tobytes())
+        return h.hexdigest()
+
+    def _compute(self):
+        if HAS_NUMBA:
+            self._compute_numba()
+        else:
+            self._compute_numpy()
+
+    def _path_loss_coefficients(self) -> Tuple[float, float]:
+        # PL = A + 10n log10(d / d0) = (A - 10n log10(d0)) + 10n log10(d)
+        k = 10 * self.pl_model.n
+        offset = self.pl_model.pl_ref - k * np.log10(REFERENCE_DISTANCE)
+        return k, offset
+
+    def _compute_numba(self, use_grid: Optional[bool] = None) -> np.ndarray:
+        # One fused pass: each (i, j) computes distance, path loss, wall and
+        # floor attenuation and writes only the final float32, so no (N, M)
+        # intermediates are materialized. The kernels read the contiguous
+        # SoA arrays directly, no per-call copies.
+        b = self.building
+        k, offset = self._path_loss_coefficients()
+        # Plain ndarray view, so a memmap-backed matrix reuses the same
+        # compiled kernel signature
+        out = np.asarray(self.matrix)
+        args = (
+            self.candidates,
+            self.sensors,
+            b.get_floor_levels(self.candidates[:, 2]),
+            b.get_floor_levels(self.sensors[:, 2]),
+            b.wall_coords,
+            b.wall_dx,
+            b.wall_dy,
+            b.wall_z_top,
+            b.wall_attenuation,
+            FLOOR_ATTENUATION,
+            k,
+            offset,
+            self.max_useful_loss,
+        )
+        if use_grid is None:
+            use_grid = len(b.walls_xyz) >= WALL_GRID_MIN_WALLS
+        if use_grid:
+            # Only test the walls in the grid cells each ray passes through
+            g = b.get_wall_grid()
+            loss_matrix_grid(
+                *args,
+                g.x0,
+                g.y0,
+                g.cell_size,
+                g.nx,
+                g.ny,
+                g.cell_offsets,
+                g.cell_walls,
+                g.EPS,
+                out,
+            )
+        else:
+            loss_matrix(*args, out)
+        return self.matrix
+
+    def _compute_numpy(self) -> np.ndarray:
         # 1. Calculate Distances (Vectorized)
-        c_coords = np.array([[p.x, p.y, p.z] for p in self.candidates])
-        s_coords = np.array([[p.x, p.y, p.z] for p in self.sensors])
-        dists = cdist(c_coords, s_coords)
+        # Accumulated axis by axis, since cdist can only write float64. Both
+        # float32 scratch buffers are locals, freed as soon as the matrix is
+        # written rather than held for the lifetime of the LossMatrix.
+        dists = np.zeros(self.matrix.shape, dtype=np.float32)
+        diff = np.empty(self.matrix.shape, dtype=np.float32)
+        for axis in range(3):
+            np.subtract.outer(self.candidates[:, axis], self.sensors[:, axis], out=diff)
+            diff *= diff
+            dists += diff
+        np.sqrt(dists, out=dists)
 
         # 2. Calculate Free Space Path Loss
         # Avoid log(0)
         dists[dists == 0] = 0.1
-        # Vectorized path loss calculation
-        # PL = A + 10n log10(d)
-        path_losses = self.pl_model.pl_ref + 10 * self.pl_model.n * np.log10(
-            dists / REFERENCE_DISTANCE
-        )
+        # Vectorized path loss calculation, evaluated in place in the
+        # distance buffer (no (N, M) temporaries). k and offset are float64
+        # constants, applied as float32 scalars.
+        k, offset = self._path_loss_coefficients()
+        path_losses = np.log10(dists, out=dists)
+        path_losses *= k
+        path_losses += offset
+
+        # 3. Calculate Wall + Floor Attenuation (the O(N*M*W) part)
+        floor_losses = self._floor_losses()
+        # Walls only add loss, so pairs already out of range skip them. The
+        # sum reuses the diff buffer instead of allocating a temporary.
+        skip = None
+        if np.isfinite(self.max_useful_loss):
+            np.add(path_losses, floor_losses, out=diff)
+            skip = diff > self.max_useful_loss
+        wall_losses = self._wall_losses_python(skip)
+        wall_losses += floor_losses
 
-        # 3. Calculate Wall Attenuation (Iterative - Slow part, but done once)
-        # Optimization: Only check walls if distance is large enough to matter?
-        # For now, brute force ray trace for accuracy
-        wall_losses = np.zeros_like(path_losses)
+        return np.add(path_losses, wall_losses, out=self.matrix)
+
+    def _floor_losses(self) -> np.ndarray:
+        # Floor levels only depend on each point's Z: O(N + M) lookups
+        c_floors = self.building.get_floor_levels(self.candidates[:, 2])
+        s_floors = self.building.get_floor_levels(self.sensors[:, 2])
+        floor_losses = np.subtract.outer(c_floors, s_floors).astype(np.float32)
+        np.abs(floor_losses, out=floor_losses)
+        floor_losses *= np.float32(FLOOR_ATTENUATION)
+        return floor_losses
+
+    def _wall_losses_python(self, skip: Optional[np.ndarray] = None) -> np.ndarray:
+        # Brute force ray trace through the scalar RayTracing API; pairs
+        # where skip[i, j] is set are left at zero
+        wall_losses = np.zeros(self.matrix.shape, dtype=np.float32)
 
         # Iterate through all pairs (This is O(N*M*W))
         # Can be slow for large grids.
-        # TODO: Optimize with spatial indexing if needed.
-        for i, c_pt in enumerate(self.candidates):
-            for j, s_pt in enumerate(self.sensors):
-                w_loss = RayTracing.calculate_wall_loss(c_pt, s_pt, self.building)
+        # The scalar ray tracer works on Point objects
+        c_pts = [Point(x, y, z) for x, y, z in self.candidates.tolist()]
+        s_pts = [Point(x, y, z) for x, y, z in self.sensors.tolist()]
+        walls = self.building.get_wall_array()
+        for i, c_pt in enumerate(c_pts):
+            for j, s_pt in enumerate(s_pts):
+                if skip is not None and skip[i, j]:
+                    continue
+                wall_losses[i, j] = RayTracing.calculate_wall_loss(
+                    c_pt, s_pt, self.building, walls
+                )
+        return wall_losses
 
-                # Floor Attenuation
-                c_floor = self.building.get_floor_level(c_pt.z)
-                s_floor = self.building.get_floor_level(s_pt.z)
-                f_loss = abs(c_floor - s_floor) * FLOOR_ATTENUATION
 
-                wall_losses[i, j] = w_loss + f_loss
+def warm_up_kernels():
+    """
+    Compiles the numba loss-matrix kernels on a tiny building, so that they
+    are stored in numba's on-disk cache. Run once after installing
+    (python -m src.physics) to take the JIT cost out of the first real run.
+    """
+    if not HAS_NUMBA:
+        return
+    room = Room("Warm-up", floor_level=0, height=3.0)
+    corners = [Point(0, 0, 0), Point(1, 0, 0), Point(1, 1, 0), Point(0, 1, 0)]
+    for start, end in zip(corners, corners[1:] + corners[:1]):
+        room.add_wall(start, end, "concrete")
+    building = Building("Warm-up")
+    building.add_room(room)
 
-        self.matrix = path_losses + wall_losses
-        print("Loss Matrix Computation Complete.")
-        return self.matrix
+    points = np.array([[0.25, 0.25, 1.0], [2.0, 0.5, 1.0]])
+    lm = LossMatrix(building, points, points)
+    lm._compute_numba(use_grid=False)
+    lm._compute_numba(use_grid=True)
+
+
+if __name__ == "__main__":
+    warm_up_kernels()
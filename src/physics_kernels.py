@@ -0,0 +1,307 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+except ImportError:  # Optional: physics.py falls back to the Python ray tracer
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+
+    # The intersection test is compiled without fastmath: FMA contraction
+    # and reassociation can flip the inclusive 0 <= ua <= 1 tests for rays
+    # passing exactly through wall endpoints (common on regular grids).
+    # error_model="numpy" makes x / 0 give inf/nan instead of raising, which
+    # lets it run without branches.
+
+    @njit(cache=True, error_model="numpy")
+    def _ray_hits_wall(
+        x1, y1, z1, x2, y2, z2, wall_coords, wall_dx, wall_dy, wall_z_top, k
+    ):
+        # RayTracing.intersect for wall k; coordinates are widened to float64.
+        # All predicates are evaluated and ANDed (no early exits) so the wall
+        # loop is straight-line code; parallel walls (denom == 0) produce
+        # inf/nan for ua/ub and are rejected by the denom test.
+        x3 = np.float64(wall_coords[0, k])
+        y3 = np.float64(wall_coords[1, k])
+        z_base = np.float64(wall_coords[2, k])
+        wdx = wall_dx[k]
+        wdy = wall_dy[k]
+        denom = wdy * (x2 - x1) - wdx * (y2 - y1)
+        ua = (wdx * (y1 - y3) - wdy * (x1 - x3)) / denom
+        ub = ((x2 - x1) * (y1 - y3) - (y2 - y1) * (x1 - x3)) / denom
+        z_interp = z1 + ua * (z2 - z1)
+        return (
+            (denom != 0)
+            & (ua >= 0)
+            & (ua <= 1)
+            & (ub >= 0)
+            & (ub <= 1)
+            & (z_interp >= z_base)
+            & (z_interp <= wall_z_top[k])
+        )
+
+    # Only the attenuation sum may be reassociated, which is what lets LLVM
+    # vectorize the branchless wall loop. The hit test above keeps strict
+    # IEEE semantics (fast-math flags are per instruction, so they do not
+    # leak into it when it is inlined).
+    @njit(cache=True, error_model="numpy", fastmath={"reassoc"})
+    def _wall_loss_brute(
+        x1, y1, z1, x2, y2, z2, wall_coords, wall_dx, wall_dy, wall_z_top, wall_att
+    ):
+        # Attenuation of the walls crossed by one ray, testing every wall
+        total = 0.0
+        for k in range(wall_coords.shape[1]):
+            hit = _ray_hits_wall(
+                x1, y1, z1, x2, y2, z2, wall_coords, wall_dx, wall_dy, wall_z_top, k
+            )
+            total += hit * wall_att[k]
+        return total
+
+    @njit(cache=True, error_model="numpy")
+    def _wall_loss_grid(
+        x1,
+        y1,
+        z1,
+        x2,
+        y2,
+        z2,
+        wall_coords,
+        wall_dx,
+        wall_dy,
+        wall_z_top,
+        wall_att,
+        x0,
+        y0,
+        cell_size,
+        nx,
+        ny,
+        cell_offsets,
+        cell_walls,
+        eps,
+        stamp,
+        ray_id,
+    ):
+        """
+        Same result as _wall_loss_brute, but only tests the walls registered
+        in the WallGrid cells the ray passes through. The ray is walked
+        column by column along X; within a column the Y extent of the
+        segment (padded by eps) gives the rows to visit. stamp[k] == ray_id
+        marks walls already tested for this ray, so a wall spanning several
+        cells is only counted once.
+        """
+        x_min = min(x1, x2)
+        x_max = max(x1, x2)
+        col_lo = int(np.floor((x_min - eps - x0) / cell_size))
+        col_hi = int(np.floor((x_max + eps - x0) / cell_size))
+        col_lo = min(max(col_lo, 0), nx - 1)
+        col_hi = min(max(col_hi, 0), nx - 1)
+
+        total = 0.0
+        for col in range(col_lo, col_hi + 1):
+            # Part of the segment inside this column (border columns
+            # extend to infinity, matching the clamped cell lookup)
+            xl = x_min
+            xr = x_max
+            if col > 0:
+                xl = max(xl, x0 + col * cell_size)
+            if col < nx - 1:
+                xr = min(xr, x0 + (col + 1) * cell_size)
+            if x2 != x1:
+                slope = (y2 - y1) / (x2 - x1)
+                ya = y1 + (xl - x1) * slope
+                yb = y1 + (xr - x1) * slope
+            else:
+                ya = y1
+                yb = y2
+            row_lo = int(np.floor((min(ya, yb) - eps - y0) / cell_size))
+            row_hi = int(np.floor((max(ya, yb) + eps - y0) / cell_size))
+            row_lo = min(max(row_lo, 0), ny - 1)
+            row_hi = min(max(row_hi, 0), ny - 1)
+
+            for row in range(row_lo, row_hi + 1):
+                c = col * ny + row
+                for p in range(cell_offsets[c], cell_offsets[c + 1]):
+                    k = cell_walls[p]
+                    if stamp[k] == ray_id:
+                        continue
+                    stamp[k] = ray_id
+                    hit = _ray_hits_wall(
+                        x1,
+                        y1,
+                        z1,
+                        x2,
+                        y2,
+                        z2,
+                        wall_coords,
+                        wall_dx,
+                        wall_dy,
+                        wall_z_top,
+                        k,
+                    )
+                    total += hit * wall_att[k]
+        return total
+
+    @njit(cache=True)
+    def _path_and_floor_loss(
+        x1, y1, z1, x2, y2, z2, levels, floor_att, pl_k, pl_offset
+    ):
+        # Log-distance path loss PL = offset + k * log10(d), plus floor_att
+        # per floor crossed (levels = |floor(candidate) - floor(sensor)|)
+        d = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2 + (z2 - z1) ** 2)
+        if d == 0:
+            d = 0.1  # Avoid log(0)
+        return pl_offset + pl_k * np.log10(d) + levels * floor_att
+
+    @njit(parallel=True, cache=True)
+    def loss_matrix(
+        candidates,
+        sensors,
+        c_floor,
+        s_floor,
+        wall_coords,
+        wall_dx,
+        wall_dy,
+        wall_z_top,
+        wall_att,
+        floor_att,
+        pl_k,
+        pl_offset,
+        max_loss,
+        out,
+    ):
+        """
+        Fused loss-matrix kernel: for every candidate->sensor pair computes
+        distance, path loss, wall attenuation (testing every wall) and floor
+        attenuation, and writes only the float32 total into out (N, M).
+        Pairs whose path + floor loss already exceeds max_loss skip the
+        wall pass and keep that lower bound.
+        Takes the (N, 3) / (M, 3) point arrays, per-point floor levels and
+        Building's wall SoA arrays (wall_coords, wall_dx, wall_dy,
+        wall_z_top, wall_attenuation) directly.
+        """
+        n = candidates.shape[0]
+        m = sensors.shape[0]
+        # Parallel over the flat pair index rather than over candidates, so
+        # all threads get work even when there are only a few candidates.
+        for p in prange(n * m):
+            i = p // m
+            j = p - i * m
+            x1 = np.float64(candidates[i, 0])
+            y1 = np.float64(candidates[i, 1])
+            z1 = np.float64(candidates[i, 2])
+            x2 = np.float64(sensors[j, 0])
+            y2 = np.float64(sensors[j, 1])
+            z2 = np.float64(sensors[j, 2])
+            total = _path_and_floor_loss(
+                x1,
+                y1,
+                z1,
+                x2,
+                y2,
+                z2,
+                abs(c_floor[i] - s_floor[j]),
+                floor_att,
+                pl_k,
+                pl_offset,
+            )
+            # Walls only add loss: past max_loss the pair can never be
+            # covered, so the wall pass is skipped and the lower bound kept
+            if total <= max_loss:
+                total += _wall_loss_brute(
+                    x1,
+                    y1,
+                    z1,
+                    x2,
+                    y2,
+                    z2,
+                    wall_coords,
+                    wall_dx,
+                    wall_dy,
+                    wall_z_top,
+                    wall_att,
+                )
+            out[i, j] = total
+        return out
+
+    @njit(parallel=True, cache=True)
+    def loss_matrix_grid(
+        candidates,
+        sensors,
+        c_floor,
+        s_floor,
+        wall_coords,
+        wall_dx,
+        wall_dy,
+        wall_z_top,
+        wall_att,
+        floor_att,
+        pl_k,
+        pl_offset,
+        max_loss,
+        x0,
+        y0,
+        cell_size,
+        nx,
+        ny,
+        cell_offsets,
+        cell_walls,
+        eps,
+        out,
+    ):
+        """
+        Same as loss_matrix, but the walls are looked up in a WallGrid
+        (x0 ... eps are its attributes) instead of all being tested.
+        """
+        n = candidates.shape[0]
+        m = sensors.shape[0]
+        for i in prange(n):
+            # Per-thread wall stamps for _wall_loss_grid, keyed by sensor
+            stamp = np.full(wall_coords.shape[1], -1, dtype=np.int64)
+            x1 = np.float64(candidates[i, 0])
+            y1 = np.float64(candidates[i, 1])
+            z1 = np.float64(candidates[i, 2])
+            for j in range(m):
+                x2 = np.float64(sensors[j, 0])
+                y2 = np.float64(sensors[j, 1])
+                z2 = np.float64(sensors[j, 2])
+                total = _path_and_floor_loss(
+                    x1,
+                    y1,
+                    z1,
+                    x2,
+                    y2,
+                    z2,
+                    abs(c_floor[i] - s_floor[j]),
+                    floor_att,
+                    pl_k,
+                    pl_offset,
+                )
+                if total <= max_loss:  # See loss_matrix
+                    total += _wall_loss_grid(
+                        x1,
+                        y1,
+                        z1,
+                        x2,
+                        y2,
+                        z2,
+                        wall_coords,
+                        wall_dx,
+                        wall_dy,
+                        wall_z_top,
+                        wall_att,
+                        x0,
+                        y0,
+                        cell_size,
+                        nx,
+                        ny,
+                        cell_offsets,
+                        cell_walls,
+                        eps,
+                        stamp,
+                        j,
+                    )
+                out[i, j] = total
+        return out
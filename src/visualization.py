@@ -1,6 +1,6 @@
 import plotly.graph_objects as go
 import numpy as np
-from .environment import Building, Point
+from .environment import Building, Point, as_coords
 from .config import RX_SENSITIVITY_DBM, TX_POWER_DBM
 
 
@@ -49,25 +49,32 @@ class Visualizer:
 
     def plot_solution(
         self,
-        candidates: list[Point],
+        candidates: np.ndarray,
         active_indices: list[int],
-        sensors: list[Point],
+        sensors: np.ndarray,
         loss_matrix: np.ndarray,
         title="Router Placement",
     ):
+        # Accept (N, 3) coordinate arrays or lists of Points
+        candidates = as_coords(candidates)
+        sensors = as_coords(sensors)
 
         traces = self._get_building_traces()
 
-        # 1. Plot Inactive Candidates (Small Grey Dots)
-        cand_x = [p.x for i, p in enumerate(candidates) if i not in active_indices]
-        cand_y = [p.y for i, p in enumerate(candidates) if i not in active_indices]
-        cand_z = [p.z for i, p in enumerate(candidates) if i not in active_indices]
+        # One mask splits the candidates; each group is gathered once and
+        # its columns passed on as views
+        inactive = np.ones(len(candidates), dtype=bool)
+        inactive[active_indices] = False
+        active = ~inactive
+        inactive_pts = candidates[inactive]
+        active_pts = candidates[active]
 
+        # 1. Plot Inactive Candidates (Small Grey Dots)
         traces.append(
             go.Scatter3d(
-                x=cand_x,
-                y=cand_y,
-                z=cand_z,
+                x=inactive_pts[:, 0],
+                y=inactive_pts[:, 1],
+                z=inactive_pts[:, 2],
                 mode="markers",
                 marker=dict(size=3, color="gray", opacity=0.5),
                 name="Candidate Locations",
@@ -75,15 +82,11 @@ class Visualizer:
         )
 
         # 2. Plot Active Routers (Large Red Stars)
-        active_x = [candidates[i].x for i in active_indices]
-        active_y = [candidates[i].y for i in active_indices]
-        active_z = [candidates[i].z for i in active_indices]
-
         traces.append(
             go.Scatter3d(
-                x=active_x,
-                y=active_y,
-                z=active_z,
+                x=active_pts[:, 0],
+                y=active_pts[:, 1],
+                z=active_pts[:, 2],
                 mode="markers",
                 marker=dict(size=8, color="red", symbol="diamond"),
                 name="Active Routers",
@@ -92,16 +95,16 @@ class Visualizer:
 
         # 3. Plot Sensors (Heatmap of Signal Strength)
         # Calculate max signal for each sensor
-        if len(active_indices) > 0:
-            active_losses = loss_matrix[active_indices, :]
+        if len(active_pts) > 0:
+            active_losses = loss_matrix[active]
             min_losses = np.min(active_losses, axis=0)
             signals = TX_POWER_DBM - min_losses
         else:
             signals = np.full(len(sensors), -120.0)
 
-        sens_x = [p.x for p in sensors]
-        sens_y = [p.y for p in sensors]
-        sens_z = [p.z for p in sensors]
+        sens_x = sensors[:, 0]
+        sens_y = sensors[:, 1]
+        sens_z = sensors[:, 2]
 
         traces.append(
             go.Scatter3d(
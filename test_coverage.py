@@ -0,0 +1,32 @@
+import numpy as np
+from src.coverage import (
+    coverage_matrix,
+    pack_coverage,
+    count_covered,
+    count_covered_batch,
+    count_covered_matmul,
+)
+
+
+def test_coverage_kernels():
+    print("Testing Coverage Kernels...")
+
+    rng = np.random.default_rng(0)
+    loss_matrix = rng.uniform(60, 140, size=(30, 150))
+    X = rng.random((40, 30)) < 0.1
+    X[0] = False  # No routers placed
+
+    cov = coverage_matrix(loss_matrix)
+    packed = pack_coverage(cov)
+    expected = np.array([np.any(cov[x], axis=0).sum() for x in X])
+
+    assert (count_covered_matmul(cov.astype(np.float32), X) == expected).all()
+    assert (count_covered_batch(packed, X) == expected).all()
+    for x, n in zip(X, expected):
+        assert count_covered(packed, np.flatnonzero(x)) == n
+
+    print("Coverage tests passed!")
+
+
+if __name__ == "__main__":
+    test_coverage_kernels()
@@ -26,6 +26,12 @@ def test_environment():
     print(f"Building '{b.name}' created with {len(b.rooms)} room(s).")
     print(f"Total walls: {len(b.get_all_walls())}")
 
+    # Test structure-of-arrays wall view
+    soa = b.get_all_walls_soa()
+    assert soa["starts"].shape == (4, 3)
+    assert soa["attenuation"].tolist() == [15.0, 3.0, 4.0, 15.0]
+    assert b.room_bounds.shape == (1, 6)
+
     # Test bounds
     bounds = r1.bounds()
     print(f"Room Bounds: {bounds}")
@@ -39,6 +45,23 @@ def test_environment():
 
     assert b.is_point_inside(test_p_in) == True
     assert b.is_point_inside(test_p_out) == False
+
+    # Vectorized floor lookup matches the scalar one
+    zs = [-1.0, 0.0, 1.5, 3.05, 5.0]
+    assert b.get_floor_levels(zs).tolist() == [b.get_floor_level(z) for z in zs]
+
+    # Walls added after add_room must reach the building-level caches
+    b2 = Building("Late Walls")
+    r2 = Room("Lab", floor_level=0, height=3.0)
+    b2.add_room(r2)
+    r2.add_wall(Point(0, 0, 0), Point(10, 0, 0), "concrete")
+    digest = b2.digest()
+    assert b2.walls_xyz.shape == (1, 2, 3)
+    r2.add_wall(Point(10, 0, 0), Point(10, 10, 0), "glass")
+    assert b2.walls_xyz.shape == (2, 2, 3)
+    assert b2.room_bounds[0].tolist() == [0, 0, 0, 10, 10, 3]
+    assert b2.is_point_inside(Point(5, 5, 1))
+    assert b2.digest() != digest
     print("Environment tests passed!")
 
 
@@ -0,0 +1,97 @@
+import numpy as np
+from pymoo.core.duplicate import DefaultDuplicateElimination
+from pymoo.core.population import Population
+from src.optimization import (
+    BitsetDuplicateElimination,
+    RouterPlacementProblem,
+    SparseCrossover,
+    SparseMutation,
+)
+
+
+def make_problem(n_candidates=40, n_sensors=150, **kwargs):
+    rng = np.random.default_rng(0)
+    loss_matrix = rng.uniform(60, 140, size=(n_candidates, n_sensors))
+    return RouterPlacementProblem(loss_matrix, **kwargs)
+
+
+def test_sparse_operators():
+    print("Testing Sparse Crossover and Mutation...")
+
+    problem = make_problem()
+    rng = np.random.default_rng(1)
+    X = rng.random((200, problem.n_var)) < 0.1
+    X[0] = False  # No routers placed
+    X[1] = False
+    X[1, 7] = True  # A single router, which remove must not take away
+
+    for _ in range(20):
+        Xp = SparseMutation()._do(problem, X, random_state=rng)
+        assert Xp.shape == X.shape
+        # One router is moved, added or removed: at most two bits flip
+        assert ((Xp != X).sum(axis=1) <= 2).all()
+        # Every mutated individual still places at least one router
+        assert Xp.any(axis=1).all()
+
+    parents = np.stack([X[:100], X[100:]])
+    for _ in range(20):
+        Q = SparseCrossover()._do(problem, parents, random_state=rng)
+        assert Q.shape == parents.shape
+        # Children only hold routers taken from their parents...
+        assert not (Q & ~(parents[0] | parents[1])).any()
+        # ...positions where the parents agree are inherited unchanged...
+        agree = parents[0] == parents[1]
+        assert (Q[0][agree] == parents[0][agree]).all()
+        assert (Q[1][agree] == parents[0][agree]).all()
+        # ...and each differing router goes to exactly one child
+        assert (Q[0] ^ Q[1] == parents[0] ^ parents[1]).all()
+
+    print("Sparse operator tests passed!")
+
+
+def test_duplicate_elimination():
+    print("Testing Bitset Duplicate Elimination...")
+
+    rng = np.random.default_rng(2)
+    # Draw individuals from a small pool so that duplicates are common,
+    # with n_var not a multiple of 8 to exercise the packbits padding
+    pool = rng.random((15, 43)) < 0.1
+    pool[0] = False
+    pop = Population.new("X", pool[rng.integers(len(pool), size=60)])
+    other = Population.new("X", pool[rng.integers(len(pool), size=10)])
+
+    for args in ((), (other,)):
+        _, keep, dup = BitsetDuplicateElimination().do(pop, *args, return_indices=True)
+        _, ref_keep, ref_dup = DefaultDuplicateElimination().do(
+            pop, *args, return_indices=True
+        )
+        assert len(dup) > 0
+        assert keep == ref_keep and dup == ref_dup
+
+    print("Duplicate elimination tests passed!")
+
+
+def test_objective_cache():
+    print("Testing Objective Cache...")
+
+    rng = np.random.default_rng(3)
+    pool = rng.random((50, 40)) < 0.1
+    for method in ("matmul", "bitset"):
+        uncached = make_problem(method=method, cache_size=0)
+        # A cache smaller than the pool, so that entries get evicted
+        cached = make_problem(method=method, cache_size=30)
+        for _ in range(10):
+            # Successive populations overlap, as offspring do across generations
+            X = pool[rng.integers(len(pool), size=25)]
+            F = cached.evaluate(X, return_values_of=["F"])
+            assert (F == uncached.evaluate(X, return_values_of=["F"])).all()
+            assert len(cached._cache) <= 30
+        assert len(uncached._cache) == 0
+
+    print("Objective cache tests passed!")
+
+
+if __name__ == "__main__":
+    test_sparse_operators()
+    test_duplicate_elimination()
+    test_objective_cache()
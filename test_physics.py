@@ -0,0 +1,96 @@
+import tempfile
+import numpy as np
+from src.environment import Building, Room, Point, WallGrid
+from src.physics import LossMatrix
+from src.physics_kernels import HAS_NUMBA
+
+if HAS_NUMBA:
+    from src.physics_kernels import loss_matrix, loss_matrix_grid
+
+
+def make_building():
+    b = Building("Test Lab")
+    for level in range(2):
+        z = level * 3.0
+        r = Room(f"Hall {level}", floor_level=level, height=3.0)
+        r.add_wall(Point(0, 0, z), Point(10, 0, z), "concrete")
+        r.add_wall(Point(10, 0, z), Point(10, 10, z), "glass")
+        r.add_wall(Point(10, 10, z), Point(0, 10, z), "drywall")
+        r.add_wall(Point(0, 10, z), Point(0, 0, z), "brick")
+        r.add_wall(Point(5, 0, z), Point(5, 6, z), "wood")  # Partition
+        b.add_room(r)
+    return b
+
+
+def test_loss_matrix_kernels():
+    print("Testing Loss Matrix Kernels...")
+
+    b = make_building()
+    rng = np.random.default_rng(0)
+    candidates = rng.uniform([0, 0, 0], [10, 10, 6], size=(12, 3))
+    # Include grid-aligned points so rays pass through wall endpoints
+    sensors = np.vstack(
+        [rng.uniform([0, 0, 0], [10, 10, 6], size=(30, 3)), [[5, 6, 1.5], [0, 5, 1.5]]]
+    )
+
+    lm = LossMatrix(b, candidates, sensors)
+    reference = lm._compute_numpy().copy()
+    if HAS_NUMBA:
+        # Same walls and floors; path loss only differs in float32 rounding
+        assert np.allclose(lm._compute_numba(), reference, rtol=0, atol=1e-3)
+
+    matrix = lm.compute()
+    assert matrix.shape == (12, 32)
+    assert matrix.dtype == np.float32
+
+    # Pruning is opt-in; pruned pairs keep a lower bound above the limit
+    pruned = LossMatrix(b, candidates, sensors, max_useful_loss=60.0).compute()
+    assert np.array_equal(matrix <= 60.0, pruned <= 60.0)
+    assert np.all(pruned <= matrix)
+    assert np.any(pruned < matrix)
+
+    # The disk cache is filled on the first run and memory-mapped after that
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = LossMatrix(b, candidates, sensors, cache_dir=cache_dir).compute()
+        second = LossMatrix(b, candidates, sensors, cache_dir=cache_dir)
+        assert np.array_equal(first, matrix)
+        assert np.array_equal(second.compute(), matrix)
+        del first, second  # Unmap before the directory is removed
+    print("Loss matrix tests passed!")
+
+
+def test_wall_grid_kernel():
+    if not HAS_NUMBA:
+        return
+    print("Testing Wall Grid Kernel...")
+
+    b = make_building()
+    rng = np.random.default_rng(1)
+    points = rng.uniform([-2, -2, 0], [12, 12, 6], size=(40, 3))
+    floors = b.get_floor_levels(points[:, 2])
+    args = (points, points, floors, floors, b.wall_coords)
+    args += (b.wall_dx, b.wall_dy, b.wall_z_top, b.wall_attenuation, 15.0, 25.0, 40.0)
+    args += (np.inf,)
+    reference = loss_matrix(*args, np.empty((40, 40), dtype=np.float32))
+    # Small cells so walls and rays span several of them
+    for cell_size in (1.0, 2.5, 50.0):
+        g = WallGrid(b.walls_xyz, cell_size)
+        out = loss_matrix_grid(
+            *args,
+            g.x0,
+            g.y0,
+            g.cell_size,
+            g.nx,
+            g.ny,
+            g.cell_offsets,
+            g.cell_walls,
+            g.EPS,
+            np.empty((40, 40), dtype=np.float32),
+        )
+        assert np.array_equal(out, reference)
+    print("Wall grid tests passed!")
+
+
+if __name__ == "__main__":
+    test_loss_matrix_kernels()
+    test_wall_grid_kernel()
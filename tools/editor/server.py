@@ -1,9 +1,13 @@
 import http.server
-import socketserver
 import json
 import os
 import sys
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library json module
+    orjson = None
+
 PORT = 8000
 # The directory where this script is located
 EDITOR_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,72 +15,107 @@ EDITOR_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(EDITOR_DIR))
 LAYOUT_FILE = os.path.join(PROJECT_ROOT, "layout.json")
 
+# path -> ((mtime_ns, size), file bytes); entries are refreshed when the file changes
+_CACHE: dict[str, tuple[tuple[int, int], bytes]] = {}
+
+
+def read_cached(path: str) -> bytes:
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, "rb") as f:
+            cached = _CACHE[path] = (key, f.read())
+    return cached[1]
+
+
+def loads_json(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(data) -> bytes:
+    """Serializes data as UTF-8 JSON indented by 2 spaces."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    # Raw UTF-8 like orjson, so both paths write byte-identical files
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
 
 class Handler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         if self.path == "/api/layout":
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
             if os.path.exists(LAYOUT_FILE):
-                with open(LAYOUT_FILE, "r") as f:
-                    self.wfile.write(f.read().encode())
+                self._send_file(LAYOUT_FILE, "application/json")
             else:
-                self.wfile.write(b"{}")
+                self._send_bytes(b"{}", "application/json")
         else:
             # Explicitly handle MIME types for static files to avoid Windows registry issues
             if self.path.endswith(".js"):
-                self.send_response(200)
-                self.send_header("Content-type", "application/javascript")
-                self.end_headers()
-                with open(
-                    os.path.join(EDITOR_DIR, self.path.lstrip("/").split("?")[0]), "rb"
-                ) as f:
-                    self.wfile.write(f.read())
+                self._send_static("application/javascript")
                 return
             elif self.path.endswith(".css"):
-                self.send_response(200)
-                self.send_header("Content-type", "text/css")
-                self.end_headers()
-                with open(
-                    os.path.join(EDITOR_DIR, self.path.lstrip("/").split("?")[0]), "rb"
-                ) as f:
-                    self.wfile.write(f.read())
+                self._send_static("text/css")
                 return
             super().do_GET()
 
+    def _send_static(self, content_type: str):
+        path = os.path.join(EDITOR_DIR, self.path.lstrip("/").split("?")[0])
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        self._send_file(path, content_type)
+
+    def _send_file(self, path: str, content_type: str):
+        self._send_bytes(read_cached(path), content_type)
+
+    def _send_bytes(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_POST(self):
         if self.path == "/api/save":
             content_length = int(self.headers["Content-Length"])
             post_data = self.rfile.read(content_length)
 
             try:
-                data = json.loads(post_data)
+                data = loads_json(post_data)
                 # Validate or process if needed
-                with open(LAYOUT_FILE, "w") as f:
-                    json.dump(data, f, indent=2)
+                # Serialize before opening, so a failure leaves the old file intact
+                body = dumps_json(data)
+                with open(LAYOUT_FILE, "wb") as f:
+                    f.write(body)
 
                 self.send_response(200)
                 self.send_header("Content-type", "application/json")
                 self.end_headers()
                 self.wfile.write(b'{"status": "success", "message": "Layout saved"}')
                 print(f"Layout saved to {LAYOUT_FILE}")
+            except ValueError as e:
+                # Malformed JSON (orjson.JSONDecodeError is a ValueError too)
+                self._send_error_json(400, e)
             except Exception as e:
-                self.send_response(500)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"status": "error", "message": str(e)}).encode()
-                )
+                self._send_error_json(500, e)
         else:
             self.send_error(404)
 
+    def _send_error_json(self, code: int, e: Exception):
+        self.send_response(code)
+        self.send_header("Content-type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"status": "error", "message": str(e)}).encode())
+
 
 if __name__ == "__main__":
     # Change to the editor directory so we can serve index.html easily
     os.chdir(EDITOR_DIR)
 
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    # One thread per request, so a slow client does not block the others
+    with http.server.ThreadingHTTPServer(("", PORT), Handler) as httpd:
         print(f"Serving Editor at http://localhost:{PORT}")
         print(f"Editing layout file: {LAYOUT_FILE}")
         try: